@@ -2,8 +2,12 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import io
 import os
-from model import calculate_student_metrics, identify_strengths_weaknesses, calculate_average_performance, evaluate_model, generate_specific_recommendations
+import pickle
+import pyarrow as pa
+import pyarrow.parquet as pq
+from model import SECTION_DTYPE, calculate_student_metrics, identify_strengths_weaknesses, calculate_average_performance, evaluate_model, generate_specific_recommendations
 from utils import visualize_student_performance, visualize_student_vs_average
 from dotenv import load_dotenv
 # Load environment variables from .env file
@@ -14,6 +18,213 @@ os.makedirs('data', exist_ok=True)
 
 # Get API key from environment variables
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+
+DATABASE_PATH = 'data/students'
+LEGACY_CSV_PATH = 'data/student_data.csv'
+PIPELINE_CACHE_PATH = 'data/pipeline.pkl'
+# Bump whenever the pipeline or its outputs change so stale pickles are ignored
+PIPELINE_CACHE_VERSION = 1
+
+# Column types declared up front so pandas skips dtype inference; raw columns are
+# Arrow-backed so string ids and topics never become Python objects
+CSV_DTYPES = {'student_id': 'string[pyarrow]', 'section': SECTION_DTYPE, 'is_correct': 'bool[pyarrow]'}
+
+def read_student_csv(source):
+    """Read a student answers CSV with typed, Arrow-backed columns"""
+    return pd.read_csv(source, engine='pyarrow', dtype_backend='pyarrow', dtype=CSV_DTYPES,
+                       true_values=['true', 'True', '1'], false_values=['false', 'False', '0'])
+
+def save_data(data, path):
+    """
+    Write students into the Parquet dataset partitioned by student_id, replacing the
+    partitions of any students already stored so other students' files are never touched
+    """
+    # delete_matching clears only the partitions being written and handles the
+    # URI-encoding of partition directory names, so ids are never used as raw paths
+    pq.write_to_dataset(pa.Table.from_pandas(data, preserve_index=False), root_path=path,
+                        partition_cols=['student_id'], compression='zstd',
+                        existing_data_behavior='delete_matching')
+
+def migrate_csv_database():
+    """One-time conversion of the legacy CSV database to the partitioned dataset"""
+    if not os.path.exists(DATABASE_PATH) and os.path.exists(LEGACY_CSV_PATH):
+        save_data(read_student_csv(LEGACY_CSV_PATH), DATABASE_PATH)
+
+def database_fingerprint(path):
+    """
+    Newest file mtime and file count under the dataset at path. Replacing a student swaps
+    files inside its partition directory without touching the root directory's own mtime
+    """
+    latest, count = 0, 0
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                else:
+                    latest = max(latest, entry.stat().st_mtime_ns)
+                    count += 1
+    return latest, count
+
+@st.cache_data
+def load_data(path, fingerprint):
+    """Load the student database; fingerprint is part of the cache key so edits to the dataset invalidate it"""
+    data = pd.read_parquet(path, dtype_backend='pyarrow')
+    # Partition values come back as a dictionary column; restore the stored dtypes
+    return data.astype({'student_id': CSV_DTYPES['student_id'], 'section': SECTION_DTYPE})
+
+@st.cache_data(hash_funcs={pd.DataFrame: lambda df: pd.util.hash_pandas_object(df).sum()})
+def compute_pipeline(data):
+    """Run the class-wide analysis once per distinct dataset instead of on every rerun"""
+    student_section_performance, student_overall = calculate_student_metrics(data.copy())
+    avg_section_performance, avg_overall_performance = calculate_average_performance(student_section_performance, student_overall)
+    strengths_weaknesses = identify_strengths_weaknesses(student_section_performance, avg_section_performance)
+    data_hash = int(pd.util.hash_pandas_object(data).sum())
+    return (student_section_performance, student_overall, avg_section_performance, avg_overall_performance,
+            strengths_weaknesses, data_hash)
+
+@st.cache_data
+def load_pipeline(path, fingerprint, _data):
+    """
+    Pipeline outputs for the database at path, reusing the copy pickled by an earlier server
+    run when the database fingerprint still matches, so a restart does not recompute everything
+    """
+    key = {'version': PIPELINE_CACHE_VERSION, 'path': path, 'fingerprint': fingerprint}
+    try:
+        with open(PIPELINE_CACHE_PATH, 'rb') as f:
+            cached = pickle.load(f)
+        if isinstance(cached, dict) and cached.get('key') == key:
+            return cached['outputs']
+    except Exception:
+        # A missing, truncated or incompatible cache file is just a miss
+        pass
+    
+    outputs = compute_pipeline(_data)
+    # Write to a temporary file first so concurrent sessions never read a partial pickle;
+    # the disk cache is best-effort, so a failed write only costs a recompute next restart
+    tmp_path = f"{PIPELINE_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'key': key, 'outputs': outputs}, f, protocol=5)
+        os.replace(tmp_path, PIPELINE_CACHE_PATH)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return outputs
+
+def render_png(fig):
+    """Encode a figure as PNG bytes (with st.pyplot's save options) and release it"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+# Charts are cached as rendered PNG bytes keyed by (student, dataset hash), so reruns skip
+# both drawing and savefig; underscore-prefixed arguments are left out of the key
+@st.cache_data(max_entries=64)
+def get_performance_png(student_id, data_hash, _student_section_performance, _student_overall,
+                        _avg_section_performance, _avg_overall_performance):
+    """Render the overall performance figure once per student and dataset"""
+    return render_png(visualize_student_performance(_student_section_performance, _student_overall,
+                                                    _avg_section_performance, _avg_overall_performance, student_id))
+
+@st.cache_data(max_entries=64)
+def get_comparison_png(student_id, data_hash, _student_data, _avg_section_performance, _section_mapping):
+    """Render the student vs class average figure once per student and dataset"""
+    return render_png(visualize_student_vs_average(_student_data, _avg_section_performance, _section_mapping))
+
+# Only this function reruns when the student selection or its widgets change; the
+# class-wide pipeline and the rest of the page are left alone
+@st.fragment
+def student_detail(data, student_section_performance, student_overall, avg_section_performance,
+                   avg_overall_performance, strengths_weaknesses, data_hash):
+    """Per-student analysis: selector, charts, section breakdown and recommendations"""
+    # Student selector; student_overall already has one row per student
+    selected_student = st.selectbox("Select a student to analyze:", student_overall['student_id'])
+    
+    # Display raw data for selected student
+    if st.checkbox("Show raw data for selected student"):
+        st.subheader("Raw Data Preview")
+        st.dataframe(data[data['student_id'] == selected_student], use_container_width=True)
+    
+    # Visualize overall performance
+    st.subheader("Overall Performance Analysis")
+    st.image(get_performance_png(selected_student, data_hash, student_section_performance, student_overall,
+                                 avg_section_performance, avg_overall_performance), use_container_width=True)
+    
+    # Individual student analysis
+    st.subheader(f"Detailed Analysis for Student ID: {selected_student}")
+    
+    # Performance metrics
+    student_data = student_section_performance[student_section_performance['student_id'] == selected_student]
+    
+    # Section performance
+    st.markdown("### Section Performance:")
+    section_data = student_data[['section', 'sum', 'count', 'score_percentage']]
+    section_data.columns = ['Section', 'Correct Answers', 'Total Questions', 'Score (%)']
+    
+    # Map section codes to subject names
+    section_mapping = {'A': 'Math', 'B': 'Verbal', 'C': 'Non-verbal', 'D': 'Comprehension'}
+    section_data['Subject'] = section_data['Section'].map(section_mapping)
+    
+    # Add the class average for comparison
+    avg_lookup = avg_section_performance.set_index('section')['avg_score_percentage']
+    section_data['Class Average (%)'] = section_data['Section'].map(avg_lookup).astype(float)
+    
+    # Add difference from average
+    section_data['Difference from Average'] = section_data['Score (%)'] - section_data['Class Average (%)']
+    
+    # Reorder columns for better presentation
+    section_data = section_data[['Subject', 'Section', 'Correct Answers', 'Total Questions', 
+                                'Score (%)', 'Class Average (%)', 'Difference from Average']]
+    
+    st.dataframe(section_data, hide_index=True, use_container_width=True)
+    
+    # Overall score comparison
+    overall = student_overall[student_overall['student_id'] == selected_student]['overall_score'].values[0]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Student's Overall Score", f"{overall:.2f}%")
+    with col2:
+        st.metric("Class Average", f"{avg_overall_performance:.2f}%")
+    with col3:
+        difference = overall - avg_overall_performance
+        st.metric("Difference from Average", f"{difference:.2f}%", 
+                  delta=f"{difference:.2f}%", delta_color="normal")
+    
+    # Strengths and weaknesses
+    st.markdown("### Performance Summary:")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Strengths:**", ', '.join(f"{section_mapping[s]} (Section {s})" for s in strengths_weaknesses[selected_student]['strengths']))
+    with col2:
+        st.write("**Areas for Improvement:**", ', '.join(f"{section_mapping[w]} (Section {w})" for w in strengths_weaknesses[selected_student]['weaknesses']))
+    
+    # Generate highly specific recommendations
+    with st.spinner("Generating personalized recommendations..."):
+        specific_recommendations = generate_specific_recommendations(data, selected_student, student_section_performance, 
+                                                                avg_section_performance, OPENROUTER_API_KEY)
+    
+    # Display personalized recommendations
+    st.markdown("### Personalized Recommendations:")
+    
+    for section, section_name in section_mapping.items():
+        with st.expander(f"{section_name} (Section {section}):", expanded=(section in strengths_weaknesses[selected_student]['weaknesses'])):
+            if section in specific_recommendations:
+                for recommendation in specific_recommendations[section]:
+                    st.markdown(f"• {recommendation}")
+            else:
+                st.write("No specific recommendations available for this section.")
+    
+    # Comparison with average
+    st.subheader("Comparison with Average Performance")
+    st.image(get_comparison_png(selected_student, data_hash, student_data, avg_section_performance, section_mapping),
+             use_container_width=True)
+
 def main():
     st.set_page_config(
         page_title="Student Performance Analysis",
@@ -23,11 +234,17 @@ def main():
     
     st.title("Student Performance Analysis and Recommendations")
     
+    migrate_csv_database()
+    
     upload_mode = st.radio("Select upload mode:", ["Existing database", "New student data"])
 
+    # Fingerprint of the stored database backing `data`; None when data was never saved
+    fingerprint = None
+    
     if upload_mode == "Existing database":
         try:
-            data = pd.read_csv('data/student_data.csv')
+            fingerprint = database_fingerprint(DATABASE_PATH)
+            data = load_data(DATABASE_PATH, fingerprint)
             st.success("Using existing student database")
         except FileNotFoundError:
             st.error("Database file not found. Please upload a CSV file.")
@@ -35,36 +252,29 @@ def main():
     else:
         uploaded_file = st.file_uploader("Upload new student data", type=["csv"])
         if uploaded_file is not None:
-            new_student_data = pd.read_csv(uploaded_file)
+            new_student_data = read_student_csv(uploaded_file)
             
             try:
-                # Save uploaded data
-                os.makedirs('data', exist_ok=True)
-                new_student_data.to_csv('data/student_data.csv', index=False)
-                data = new_student_data
-                st.success(f"Created new database with {len(new_student_data['student_id'].unique())} students")
+                # Add uploaded students to the database, replacing any with the same ID
+                save_data(new_student_data, DATABASE_PATH)
+                load_data.clear()
+                load_pipeline.clear()
+                fingerprint = database_fingerprint(DATABASE_PATH)
+                data = load_data(DATABASE_PATH, fingerprint)
+                st.success(f"Added {new_student_data['student_id'].nunique()} students to the database")
             except Exception as e:
                 st.error(f"Error saving data: {e}")
+                fingerprint = None
                 data = new_student_data
         else:
             st.warning("Please upload student data")
             data = None
     
     if data is not None:
-        # Student selector
-        student_ids = data['student_id'].unique()
-        selected_student = st.selectbox("Select a student to analyze:", student_ids)
-        
-        # Display raw data for selected student
-        if st.checkbox("Show raw data for selected student"):
-            st.subheader("Raw Data Preview")
-            st.dataframe(data[data['student_id'] == selected_student], use_container_width=True)
-        
-        # Process data
-        student_section_performance, student_overall = calculate_student_metrics(data)
-        
-        # Calculate average performance
-        avg_section_performance, avg_overall_performance = calculate_average_performance(student_section_performance, student_overall)
+        # Process data (cached per dataset, and on disk for the stored database)
+        outputs = load_pipeline(DATABASE_PATH, fingerprint, data) if fingerprint is not None else compute_pipeline(data)
+        (student_section_performance, student_overall, avg_section_performance,
+         avg_overall_performance, strengths_weaknesses, data_hash) = outputs
         
         # Display class averages
         st.subheader("Class Performance Averages")
@@ -76,9 +286,10 @@ def main():
         with col2:
             # Display section averages
             section_mapping = {'A': 'Math', 'B': 'Verbal', 'C': 'Non-verbal', 'D': 'Comprehension'}
+            sections = avg_section_performance['section'].astype(str)
             section_avg_data = pd.DataFrame({
-                'Section': [f"{section_mapping[row['section']]} ({row['section']})" for _, row in avg_section_performance.iterrows()],
-                'Average Score': [f"{row['avg_score_percentage']:.2f}%" for _, row in avg_section_performance.iterrows()]
+                'Section': sections.map(section_mapping) + ' (' + sections + ')',
+                'Average Score': avg_section_performance['avg_score_percentage'].map('{:.2f}%'.format)
             })
             st.dataframe(section_avg_data, hide_index=True, use_container_width=True)
         
@@ -89,85 +300,9 @@ def main():
             st.write(f"Model Precision: {precision:.2f}%")
             st.write("Model accuracy measures how often our prediction model correctly identifies whether a student is performing above or below average.")
         
-        # Visualize overall performance
-        st.subheader("Overall Performance Analysis")
-        fig = visualize_student_performance(student_section_performance, student_overall, 
-                                           avg_section_performance, avg_overall_performance, selected_student)
-        st.pyplot(fig)
-        
-        # Identify strengths and weaknesses
-        strengths_weaknesses = identify_strengths_weaknesses(student_section_performance, avg_section_performance)
-        
-        # Individual student analysis
-        st.subheader(f"Detailed Analysis for Student ID: {selected_student}")
-        
-        # Performance metrics
-        student_data = student_section_performance[student_section_performance['student_id'] == selected_student]
-        
-        # Section performance
-        st.markdown("### Section Performance:")
-        section_data = student_data[['section', 'sum', 'count', 'score_percentage']]
-        section_data.columns = ['Section', 'Correct Answers', 'Total Questions', 'Score (%)']
-        
-        # Map section codes to subject names
-        section_mapping = {'A': 'Math', 'B': 'Verbal', 'C': 'Non-verbal', 'D': 'Comprehension'}
-        section_data['Subject'] = section_data['Section'].map(section_mapping)
-        
-        # Add the class average for comparison
-        section_data['Class Average (%)'] = section_data['Section'].apply(
-            lambda x: avg_section_performance[avg_section_performance['section'] == x]['avg_score_percentage'].values[0]
-        )
-        
-        # Add difference from average
-        section_data['Difference from Average'] = section_data['Score (%)'] - section_data['Class Average (%)']
-        
-        # Reorder columns for better presentation
-        section_data = section_data[['Subject', 'Section', 'Correct Answers', 'Total Questions', 
-                                    'Score (%)', 'Class Average (%)', 'Difference from Average']]
-        
-        st.dataframe(section_data, hide_index=True, use_container_width=True)
-        
-        # Overall score comparison
-        overall = student_overall[student_overall['student_id'] == selected_student]['overall_score'].values[0]
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Student's Overall Score", f"{overall:.2f}%")
-        with col2:
-            st.metric("Class Average", f"{avg_overall_performance:.2f}%")
-        with col3:
-            difference = overall - avg_overall_performance
-            st.metric("Difference from Average", f"{difference:.2f}%", 
-                      delta=f"{difference:.2f}%", delta_color="normal")
-        
-        # Strengths and weaknesses
-        st.markdown("### Performance Summary:")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.write("**Strengths:**", ', '.join(f"{section_mapping[s]} (Section {s})" for s in strengths_weaknesses[selected_student]['strengths']))
-        with col2:
-            st.write("**Areas for Improvement:**", ', '.join(f"{section_mapping[w]} (Section {w})" for w in strengths_weaknesses[selected_student]['weaknesses']))
-        
-        # Generate highly specific recommendations
-        with st.spinner("Generating personalized recommendations..."):
-            specific_recommendations = generate_specific_recommendations(data, selected_student, student_section_performance, 
-                                                                    avg_section_performance, OPENROUTER_API_KEY)
-        
-        # Display personalized recommendations
-        st.markdown("### Personalized Recommendations:")
-        
-        for section, section_name in section_mapping.items():
-            with st.expander(f"{section_name} (Section {section}):", expanded=(section in strengths_weaknesses[selected_student]['weaknesses'])):
-                if section in specific_recommendations:
-                    for recommendation in specific_recommendations[section]:
-                        st.markdown(f"• {recommendation}")
-                else:
-                    st.write("No specific recommendations available for this section.")
-        
-        # Comparison with average
-        st.subheader("Comparison with Average Performance")
-        fig_comp = visualize_student_vs_average(student_data, avg_section_performance, section_mapping)
-        st.pyplot(fig_comp)
+        # Per-student analysis
+        student_detail(data, student_section_performance, student_overall, avg_section_performance,
+                       avg_overall_performance, strengths_weaknesses, data_hash)
 
 if __name__ == "__main__":
     main()
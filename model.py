@@ -3,28 +3,36 @@ import numpy as np
 import requests
 import json
 
+# Fixed section categories so group keys and comparisons work on small integer codes
+SECTION_DTYPE = pd.CategoricalDtype(categories=['A', 'B', 'C', 'D'])
+
 def calculate_student_metrics(data):
     """
     Calculate performance metrics for each student
     """
-    # Convert is_correct to boolean if it's string
-    if data['is_correct'].dtype == 'object':
-        data['is_correct'] = data['is_correct'].map({'true': True, 'false': False})
+    # Categorical sections keep the groupby hash table small (no-op if already loaded as SECTION_DTYPE)
+    data['section'] = data['section'].astype(SECTION_DTYPE)
     
     # Group by student_id and section
-    student_section_performance = data.groupby(['student_id', 'section'])['is_correct'].agg(['sum', 'count']).reset_index()
+    student_section_performance = data.groupby(['student_id', 'section'], sort=False, observed=True)['is_correct'].agg(['sum', 'count']).reset_index()
     student_section_performance['score_percentage'] = (student_section_performance['sum'] / student_section_performance['count']) * 100
     
-    # Overall student performance
-    student_overall = data.groupby('student_id')['is_correct'].agg(['sum', 'count']).reset_index()
+    # Overall student performance, derived from the section totals
+    student_overall = student_section_performance.groupby('student_id', sort=False)[['sum', 'count']].sum().reset_index()
     student_overall['overall_score'] = (student_overall['sum'] / student_overall['count']) * 100
     
+    # 32-bit columns halve the bytes moved by the merges, sorts and groupbys downstream
+    metric_dtypes = {'sum': 'int32', 'count': 'int32'}
+    student_section_performance = student_section_performance.astype({**metric_dtypes, 'score_percentage': 'float32'})
+    student_overall = student_overall.astype({**metric_dtypes, 'overall_score': 'float32'})
+    
     return student_section_performance, student_overall
 
 def calculate_average_performance(student_section_performance, student_overall):
     """Calculate average performance across all students"""
-    avg_section_performance = student_section_performance.groupby('section')['score_percentage'].mean().reset_index()
+    avg_section_performance = student_section_performance.groupby('section', observed=True)['score_percentage'].mean().reset_index()
     avg_section_performance.columns = ['section', 'avg_score_percentage']
+    avg_section_performance = avg_section_performance.astype({'avg_score_percentage': 'float32'})
     
     avg_overall_performance = student_overall['overall_score'].mean()
     
@@ -35,32 +43,31 @@ def identify_strengths_weaknesses(student_section_performance, avg_section_perfo
     Identify strengths and weaknesses for each student based on section performance
     compared to the average performance
     """
-    strengths_weaknesses = {}
+    # Scatter scores into a students x sections matrix (NaN where a student has no answers)
+    student_codes, student_ids = pd.factorize(student_section_performance['student_id'])
+    section_codes, sections = pd.factorize(student_section_performance['section'], sort=True)
+    score_matrix = np.full((len(student_ids), len(sections)), np.nan, dtype=np.float32)
+    score_matrix[student_codes, section_codes] = student_section_performance['score_percentage'].to_numpy()
     
-    for student_id in student_section_performance['student_id'].unique():
-        student_data = student_section_performance[student_section_performance['student_id'] == student_id]
-        
-        # Compare with average performance
-        comparison = []
-        for _, row in student_data.iterrows():
-            section = row['section']
-            score = row['score_percentage']
-            avg_score = avg_section_performance[avg_section_performance['section'] == section]['avg_score_percentage'].values[0]
-            diff = score - avg_score
-            comparison.append({'section': section, 'score': score, 'avg_score': avg_score, 'diff': diff})
-        
-        comparison_df = pd.DataFrame(comparison)
-        
-        # Sort by difference from average (positive = strength, negative = weakness)
-        sorted_comparison = comparison_df.sort_values('diff', ascending=False)
-        
-        strengths = sorted_comparison.head(2)['section'].values
-        weaknesses = sorted_comparison.tail(2)['section'].values
-        
+    # Compare every score with its section average in one broadcast
+    avg_scores = avg_section_performance.set_index('section')['avg_score_percentage'].reindex(sections).to_numpy()
+    diff_matrix = score_matrix - avg_scores
+    missing = np.isnan(diff_matrix)
+    
+    # Rank sections by difference from average (positive = strength, negative = weakness).
+    # Rows are only as wide as the section count, so a stable sort per row is cheap and breaks
+    # ties in section order; unanswered sections sort past the end they must not be picked from
+    top = np.argsort(np.where(missing, np.inf, -diff_matrix), axis=1, kind='stable')[:, :2]
+    bottom = np.argsort(np.where(missing, -np.inf, -diff_matrix), axis=1, kind='stable')[:, -2:]
+    
+    # Map the picked columns back to section labels, skipping sections a student never answered
+    section_labels = np.asarray(sections, dtype=object)
+    answered = ~missing
+    strengths_weaknesses = {}
+    for g, student_id in enumerate(student_ids):
         strengths_weaknesses[student_id] = {
-            'strengths': strengths,
-            'weaknesses': weaknesses,
-            'comparison': comparison_df
+            'strengths': [section_labels[c] for c in top[g] if answered[g, c]],
+            'weaknesses': [section_labels[c] for c in bottom[g] if answered[g, c]]
         }
     
     return strengths_weaknesses
@@ -78,10 +85,12 @@ def analyze_topic_data(data, student_id):
     
     if topic_col:
         # Group by section and topic
-        topic_analysis = student_data.groupby(['section', topic_col]).agg(
+        topic_analysis = student_data.groupby(['section', topic_col], observed=True).agg(
             total_questions=('is_correct', 'count'),
             correct_answers=('is_correct', 'sum')
         ).reset_index()
+        # Keep derived counts NumPy-backed like the other metric frames
+        topic_analysis = topic_analysis.astype({'total_questions': 'int32', 'correct_answers': 'int32'})
         
         # Calculate accuracy
         topic_analysis['accuracy'] = (topic_analysis['correct_answers'] / topic_analysis['total_questions']) * 100
@@ -103,6 +112,100 @@ def analyze_topic_data(data, student_id):
         # Create empty dataframe with proper columns
         return pd.DataFrame(columns=['section', 'topic', 'total_questions', 'correct_answers', 'accuracy'])
 
+# Performance assessment templates, keyed by the lower bound on the difference from average
+_ASSESSMENT_TEMPLATES = [
+    (15, "Excellent performance in {section_name}. Your score ({score:.1f}%) is {diff:.1f}% above average ({avg_score:.1f}%)."),
+    (5, "Good performance in {section_name}. Your score ({score:.1f}%) is {diff:.1f}% above average ({avg_score:.1f}%)."),
+    (-5, "Average performance in {section_name}. Your score ({score:.1f}%) is near the class average ({avg_score:.1f}%)."),
+    (-15, "Below average performance in {section_name}. Your score ({score:.1f}%) is {abs_diff:.1f}% below average ({avg_score:.1f}%)."),
+    (None, "Significant improvement needed in {section_name}. Your score ({score:.1f}%) is {abs_diff:.1f}% below average ({avg_score:.1f}%)."),
+]
+
+# Topic recommendation templates per section: (topic keywords, template) pairs tried in order,
+# with None as the catch-all for topics that match no keyword list
+_TOPIC_TEMPLATES = {
+    'A': [  # Math
+        (('algebra', 'algebraic expressions', 'equations'),
+         "Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice solving equations step-by-step, with special attention to sign rules and order of operations. Use Khan Academy's Algebra 1 course, sections 2-4."),
+        (('geometry', 'shapes', 'areas', 'volumes'),
+         "Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Review properties of triangles, circles, and quadrilaterals. Practice calculating areas and volumes using formulas. Complete 10 geometry problems daily from MathIsFun.com."),
+        (('number', 'arithmetic', 'operations', 'fractions'),
+         "Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice multiplication, division, and fraction operations. Try timed arithmetic drills at MathDrills.com to build fluency."),
+        (('data', 'statistics', 'graphs', 'probability'),
+         "Work on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice interpreting graphs, calculating averages, and solving probability problems. Use StatisticsByJim.com for tutorials on basic statistics concepts."),
+        (None,
+         "Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice with a variety of problem types and review concepts before your next assessment."),
+    ],
+    'B': [  # Verbal
+        (('vocabulary', 'words', 'word meaning'),
+         "Build your **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Create weekly flashcards with 20 new words. Use Quizlet.com for vocabulary drills focusing on word roots, prefixes and suffixes."),
+        (('grammar', 'syntax', 'sentences'),
+         "Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Review subject-verb agreement, verb tenses, and sentence structure. Complete daily grammar exercises at Purdue OWL writing lab."),
+        (('comprehension', 'reading', 'passages'),
+         "Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice active reading: highlight main ideas, summarize paragraphs, and identify supporting details. Read 20 minutes daily from various genres."),
+        (('analogies', 'word relationships', 'comparisons'),
+         "Work on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Study different types of analogies (part-whole, cause-effect, etc.). Create your own analogies to strengthen understanding of relationships."),
+        (None,
+         "Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Focus on building a stronger foundation in this area by practicing regularly with targeted exercises."),
+    ],
+    'C': [  # Non-verbal
+        (('patterns', 'pattern recognition', 'sequence'),
+         "Practice **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Work on identifying rules in number and shape sequences. Complete 5 pattern problems daily from LumosityBrain.com."),
+        (('spatial', 'rotation', '3d', 'visualization'),
+         "Enhance **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice mental rotation exercises with 3D shapes. Use the Spatial Reasoning Trainer app for 10 minutes daily."),
+        (('analogies', 'visual analogies', 'figures'),
+         "Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice identifying the relationships between shapes, patterns, and figures. Complete one page of visual analogies from TestPrep-Online.com daily."),
+        (('matrices', 'grid', 'logic'),
+         "Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice completing logical sequences in grids. Try solving Raven's Progressive Matrices style problems weekly."),
+        (None,
+         "Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Develop your pattern recognition skills through regular practice with diverse problem types."),
+    ],
+    'D': [  # Comprehension
+        (('main idea', 'central theme', 'summary'),
+         "Focus on identifying the **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice summarizing paragraphs in 1-2 sentences. Use ReadTheory.org passages with main idea questions."),
+        (('details', 'supporting evidence', 'facts'),
+         "Work on recognizing **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Take notes while reading to identify key details. Practice with Newsela.com articles, highlighting specific facts."),
+        (('inference', 'implied meaning', 'conclusion'),
+         "Develop **{topic_name}** skills ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice reading between the lines and drawing logical conclusions. Use CommonLit.org passages with inference questions."),
+        (('author', 'purpose', 'tone', 'perspective'),
+         "Improve understanding of **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Analyze how word choice reveals the author's intent. Practice with ReadWorks.org passages focusing on tone and purpose."),
+        (None,
+         "Enhance **{topic_name}** skills ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice active reading strategies and develop your ability to analyze text at multiple levels."),
+    ],
+}
+
+# General recommendations keyed by (section, level); 'foundation' applies below 50%
+_GENERAL_RECOMMENDATIONS = {
+    ('A', 'foundation'): [
+        "**Study Plan**: Set aside 30 minutes daily for math practice. Start with basic concepts and gradually increase difficulty. Use Khan Academy's Math Fundamentals course.",
+        "**Resources**: Download the 'Photomath' app to see step-by-step solutions to problems. Visit PurpleMath.com for clear explanations of algebra concepts.",
+    ],
+    ('A', 'advanced'): [
+        "**Challenge yourself**: Try more complex word problems that combine multiple concepts. Attempt competition-level math problems from sites like ArtOfProblemSolving.com.",
+    ],
+    ('B', 'foundation'): [
+        "**Daily routine**: Read varied materials for 20 minutes daily. Keep a vocabulary journal of unfamiliar words. Use Vocabulary.com for interactive word practice.",
+        "**Resources**: Use the Merriam-Webster app for word lookups. Visit NoRedInk.com for grammar practice with immediate feedback.",
+    ],
+    ('B', 'advanced'): [
+        "**Advanced practice**: Read college-level materials and identify rhetorical devices. Write short analyses of passages to deepen comprehension.",
+    ],
+    ('C', 'foundation'): [
+        "**Practice regimen**: Spend 15 minutes daily on pattern recognition exercises. Use puzzle books and apps like BrainHQ to develop visual reasoning.",
+        "**Resources**: Try the app 'NeuroNation' for spatial reasoning games. Visit Mensa.org for free practice problems.",
+    ],
+    ('C', 'advanced'): [
+        "**Next level**: Challenge yourself with complex logic puzzles and 3D visualization exercises. Try solving Rubik's Cube to enhance spatial reasoning.",
+    ],
+    ('D', 'foundation'): [
+        "**Reading strategy**: Use the SQ3R method (Survey, Question, Read, Recite, Review) when approaching new texts. Start with shorter passages and gradually increase length.",
+        "**Resources**: Use NewsELA.com for leveled reading passages. Try ReadTheory.org for comprehension practice with instant feedback.",
+    ],
+    ('D', 'advanced'): [
+        "**Analytical reading**: Practice analyzing author's purpose, bias, and tone. Compare multiple texts on the same topic to identify different perspectives.",
+    ],
+}
+
 def generate_section_recommendations(section, score, avg_score, topic_analysis=None):
     """Generate highly specific recommendations for a given section"""
     
@@ -118,18 +221,11 @@ def generate_section_recommendations(section, score, avg_score, topic_analysis=N
     recommendations = []
     
     # Performance assessment
-    if diff > 15:
-        performance_assessment = f"Excellent performance in {section_name}. Your score ({score:.1f}%) is {diff:.1f}% above average ({avg_score:.1f}%)."
-    elif diff > 5:
-        performance_assessment = f"Good performance in {section_name}. Your score ({score:.1f}%) is {diff:.1f}% above average ({avg_score:.1f}%)."
-    elif diff > -5:
-        performance_assessment = f"Average performance in {section_name}. Your score ({score:.1f}%) is near the class average ({avg_score:.1f}%)."
-    elif diff > -15:
-        performance_assessment = f"Below average performance in {section_name}. Your score ({score:.1f}%) is {abs(diff):.1f}% below average ({avg_score:.1f}%)."
-    else:
-        performance_assessment = f"Significant improvement needed in {section_name}. Your score ({score:.1f}%) is {abs(diff):.1f}% below average ({avg_score:.1f}%)."
-    
-    recommendations.append(performance_assessment)
+    for lower_bound, template in _ASSESSMENT_TEMPLATES:
+        if lower_bound is None or diff > lower_bound:
+            break
+    recommendations.append(template.format(section_name=section_name, score=score, avg_score=avg_score,
+                                           diff=diff, abs_diff=abs(diff)))
     
     # Topic-specific recommendations based on available topics
     if topic_analysis is not None and not topic_analysis.empty:
@@ -142,57 +238,13 @@ def generate_section_recommendations(section, score, avg_score, topic_analysis=N
             
             for _, topic in weakest_topics.iterrows():
                 topic_name = topic['topic']
-                topic_accuracy = topic['accuracy']
-                topic_correct = topic['correct_answers']
-                topic_total = topic['total_questions']
-                
-                if section == 'A':  # Math
-                    if topic_name.lower() in ['algebra', 'algebraic expressions', 'equations']:
-                        recommendations.append(f"Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice solving equations step-by-step, with special attention to sign rules and order of operations. Use Khan Academy's Algebra 1 course, sections 2-4.")
-                    elif topic_name.lower() in ['geometry', 'shapes', 'areas', 'volumes']:
-                        recommendations.append(f"Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Review properties of triangles, circles, and quadrilaterals. Practice calculating areas and volumes using formulas. Complete 10 geometry problems daily from MathIsFun.com.")
-                    elif topic_name.lower() in ['number', 'arithmetic', 'operations', 'fractions']:
-                        recommendations.append(f"Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice multiplication, division, and fraction operations. Try timed arithmetic drills at MathDrills.com to build fluency.")
-                    elif topic_name.lower() in ['data', 'statistics', 'graphs', 'probability']:
-                        recommendations.append(f"Work on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice interpreting graphs, calculating averages, and solving probability problems. Use StatisticsByJim.com for tutorials on basic statistics concepts.")
-                    else:
-                        recommendations.append(f"Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice with a variety of problem types and review concepts before your next assessment.")
-                
-                elif section == 'B':  # Verbal
-                    if topic_name.lower() in ['vocabulary', 'words', 'word meaning']:
-                        recommendations.append(f"Build your **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Create weekly flashcards with 20 new words. Use Quizlet.com for vocabulary drills focusing on word roots, prefixes and suffixes.")
-                    elif topic_name.lower() in ['grammar', 'syntax', 'sentences']:
-                        recommendations.append(f"Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Review subject-verb agreement, verb tenses, and sentence structure. Complete daily grammar exercises at Purdue OWL writing lab.")
-                    elif topic_name.lower() in ['comprehension', 'reading', 'passages']:
-                        recommendations.append(f"Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice active reading: highlight main ideas, summarize paragraphs, and identify supporting details. Read 20 minutes daily from various genres.")
-                    elif topic_name.lower() in ['analogies', 'word relationships', 'comparisons']:
-                        recommendations.append(f"Work on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Study different types of analogies (part-whole, cause-effect, etc.). Create your own analogies to strengthen understanding of relationships.")
-                    else:
-                        recommendations.append(f"Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Focus on building a stronger foundation in this area by practicing regularly with targeted exercises.")
-                
-                elif section == 'C':  # Non-verbal
-                    if topic_name.lower() in ['patterns', 'pattern recognition', 'sequence']:
-                        recommendations.append(f"Practice **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Work on identifying rules in number and shape sequences. Complete 5 pattern problems daily from LumosityBrain.com.")
-                    elif topic_name.lower() in ['spatial', 'rotation', '3d', 'visualization']:
-                        recommendations.append(f"Enhance **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice mental rotation exercises with 3D shapes. Use the Spatial Reasoning Trainer app for 10 minutes daily.")
-                    elif topic_name.lower() in ['analogies', 'visual analogies', 'figures']:
-                        recommendations.append(f"Focus on **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice identifying the relationships between shapes, patterns, and figures. Complete one page of visual analogies from TestPrep-Online.com daily.")
-                    elif topic_name.lower() in ['matrices', 'grid', 'logic']:
-                        recommendations.append(f"Improve **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice completing logical sequences in grids. Try solving Raven's Progressive Matrices style problems weekly.")
-                    else:
-                        recommendations.append(f"Strengthen **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Develop your pattern recognition skills through regular practice with diverse problem types.")
-                
-                elif section == 'D':  # Comprehension
-                    if topic_name.lower() in ['main idea', 'central theme', 'summary']:
-                        recommendations.append(f"Focus on identifying the **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice summarizing paragraphs in 1-2 sentences. Use ReadTheory.org passages with main idea questions.")
-                    elif topic_name.lower() in ['details', 'supporting evidence', 'facts']:
-                        recommendations.append(f"Work on recognizing **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Take notes while reading to identify key details. Practice with Newsela.com articles, highlighting specific facts.")
-                    elif topic_name.lower() in ['inference', 'implied meaning', 'conclusion']:
-                        recommendations.append(f"Develop **{topic_name}** skills ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice reading between the lines and drawing logical conclusions. Use CommonLit.org passages with inference questions.")
-                    elif topic_name.lower() in ['author', 'purpose', 'tone', 'perspective']:
-                        recommendations.append(f"Improve understanding of **{topic_name}** ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Analyze how word choice reveals the author's intent. Practice with ReadWorks.org passages focusing on tone and purpose.")
-                    else:
-                        recommendations.append(f"Enhance **{topic_name}** skills ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Practice active reading strategies and develop your ability to analyze text at multiple levels.")
+                for keywords, template in _TOPIC_TEMPLATES.get(section, []):
+                    if keywords is None or topic_name.lower() in keywords:
+                        recommendations.append(template.format(topic_name=topic_name,
+                                                               topic_correct=topic['correct_answers'],
+                                                               topic_total=topic['total_questions'],
+                                                               topic_accuracy=topic['accuracy']))
+                        break
         
         # Find strongest topic for positive reinforcement
         if not section_topics.empty:
@@ -206,41 +258,17 @@ def generate_section_recommendations(section, score, avg_score, topic_analysis=N
                 recommendations.append(f"**Strength recognized**: Great work in {topic_name} ({topic_correct}/{topic_total} correct, {topic_accuracy:.1f}%). Continue to build on this strength with more advanced material.")
     
     # General recommendations based on section and score
-    if section == 'A':  # Math
-        if score < 50:
-            recommendations.append("**Study Plan**: Set aside 30 minutes daily for math practice. Start with basic concepts and gradually increase difficulty. Use Khan Academy's Math Fundamentals course.")
-            recommendations.append("**Resources**: Download the 'Photomath' app to see step-by-step solutions to problems. Visit PurpleMath.com for clear explanations of algebra concepts.")
-        else:
-            recommendations.append("**Challenge yourself**: Try more complex word problems that combine multiple concepts. Attempt competition-level math problems from sites like ArtOfProblemSolving.com.")
-    
-    elif section == 'B':  # Verbal
-        if score < 50:
-            recommendations.append("**Daily routine**: Read varied materials for 20 minutes daily. Keep a vocabulary journal of unfamiliar words. Use Vocabulary.com for interactive word practice.")
-            recommendations.append("**Resources**: Use the Merriam-Webster app for word lookups. Visit NoRedInk.com for grammar practice with immediate feedback.")
-        else:
-            recommendations.append("**Advanced practice**: Read college-level materials and identify rhetorical devices. Write short analyses of passages to deepen comprehension.")
-    
-    elif section == 'C':  # Non-verbal
-        if score < 50:
-            recommendations.append("**Practice regimen**: Spend 15 minutes daily on pattern recognition exercises. Use puzzle books and apps like BrainHQ to develop visual reasoning.")
-            recommendations.append("**Resources**: Try the app 'NeuroNation' for spatial reasoning games. Visit Mensa.org for free practice problems.")
-        else:
-            recommendations.append("**Next level**: Challenge yourself with complex logic puzzles and 3D visualization exercises. Try solving Rubik's Cube to enhance spatial reasoning.")
-    
-    elif section == 'D':  # Comprehension
-        if score < 50:
-            recommendations.append("**Reading strategy**: Use the SQ3R method (Survey, Question, Read, Recite, Review) when approaching new texts. Start with shorter passages and gradually increase length.")
-            recommendations.append("**Resources**: Use NewsELA.com for leveled reading passages. Try ReadTheory.org for comprehension practice with instant feedback.")
-        else:
-            recommendations.append("**Analytical reading**: Practice analyzing author's purpose, bias, and tone. Compare multiple texts on the same topic to identify different perspectives.")
+    level = 'foundation' if score < 50 else 'advanced'
+    recommendations.extend(_GENERAL_RECOMMENDATIONS.get((section, level), []))
     
     return recommendations
 
 def generate_specific_recommendations(data, student_id, student_section_performance, avg_section_performance, api_key=None):
     """Generate highly specific recommendations for a student"""
     
-    # Get student's section performance
+    # Get student's section performance alongside the class averages
     student_data = student_section_performance[student_section_performance['student_id'] == student_id]
+    student_data = student_data.merge(avg_section_performance, on='section')
     
     # Analyze topic-level data if available
     topic_analysis = analyze_topic_data(data, student_id)
@@ -248,16 +276,11 @@ def generate_specific_recommendations(data, student_id, student_section_performa
     # Generate recommendations for each section
     recommendations = {}
     
-    for _, row in student_data.iterrows():
-        section = row['section']
-        score = row['score_percentage']
-        avg_score = avg_section_performance[avg_section_performance['section'] == section]['avg_score_percentage'].values[0]
-        
+    for row in student_data.itertuples(index=False):
         # Generate section-specific recommendations
-        section_recommendations = generate_section_recommendations(section, score, avg_score, topic_analysis)
-        
-        # Add to recommendations dictionary
-        recommendations[section] = section_recommendations
+        recommendations[row.section] = generate_section_recommendations(
+            row.section, row.score_percentage, row.avg_score_percentage, topic_analysis
+        )
     
     return recommendations
 
@@ -18,6 +18,9 @@ def visualize_student_performance(student_section_performance, student_overall,
         sections = ['A', 'B', 'C', 'D']
         section_names = ['Math (A)', 'Verbal (B)', 'Non-verbal (C)', 'Comprehension (D)']
         
+        # Section averages indexed by section for constant-time lookups
+        avg_lookup = avg_section_performance.set_index('section')['avg_score_percentage']
+        
         # Prepare data for plotting
         student_scores = []
         avg_scores = []
@@ -31,11 +34,7 @@ def visualize_student_performance(student_section_performance, student_overall,
                 student_scores.append(0)
             
             # Get average score for this section
-            avg_section_data = avg_section_performance[avg_section_performance['section'] == section]
-            if not avg_section_data.empty:
-                avg_scores.append(avg_section_data['avg_score_percentage'].values[0])
-            else:
-                avg_scores.append(0)
+            avg_scores.append(avg_lookup.get(section, 0))
         
         # Create grouped bar chart
         x = np.arange(len(sections))
@@ -97,13 +96,7 @@ def visualize_student_performance(student_section_performance, student_overall,
                 student_scores.append(0)
         
         # Get average scores for each section
-        avg_scores = []
-        for section in sections:
-            avg_section_data = avg_section_performance[avg_section_performance['section'] == section]
-            if not avg_section_data.empty:
-                avg_scores.append(avg_section_data['avg_score_percentage'].values[0])
-            else:
-                avg_scores.append(0)
+        avg_scores = [avg_lookup.get(section, 0) for section in sections]
         
         # Number of variables
         N = len(sections)
@@ -146,10 +139,8 @@ def visualize_student_vs_average(student_data, avg_section_performance, section_
     student_scores = student_data['score_percentage'].values
     
     # Get average scores for the same sections
-    avg_scores = []
-    for section in sections:
-        avg_score = avg_section_performance[avg_section_performance['section'] == section]['avg_score_percentage'].values[0]
-        avg_scores.append(avg_score)
+    avg_lookup = avg_section_performance.set_index('section')['avg_score_percentage']
+    avg_scores = [avg_lookup[section] for section in sections]
     
     # Set up bar positions
     x = np.arange(len(sections))